@@ -150,6 +150,10 @@ def break_node_splitter(origin,destination,tt,min_start):
     # one in between each 11 hr break
     segment_tt = tt
     for i in range(0,long_possible_breaks):
+        # nothing left to split; don't make break nodes that can never
+        # be reached
+        if segment_tt <= 0:
+            break
         # insert 11 hr break opportunity
         pair11 = split_links_break_nodes(origin,
                                          destination,
@@ -205,6 +209,11 @@ def break_node_splitter(origin,destination,tt,min_start):
 
 
     # end of loop.  Consider boundary conditions
+    if not new_nodes:
+        # zero travel time, so the loop above made no break nodes.
+        # happens when one load's dropoff city is another load's
+        # pickup city; nothing to split, no break needed
+        return (new_times,new_nodes,min_start)
     node8 = new_nodes[-2]
     node11 = new_nodes[-1]
     # might not need a short break after long break prior to
@@ -265,7 +274,6 @@ def split_break_node(record,travel_times,min_start=None):
     if not np.isnan(tt):
         pair = break_node_splitter(record.origin,record.destination,tt,min_start)
         new_times = np.concatenate((new_times,pair[0]),axis=0)
-        new_times = np.concatenate((new_times,pair[0]),axis=0)
         new_nodes.extend(pair[1])
         min_start = pair[2]
 
@@ -290,12 +298,19 @@ def aggregate_split_nodes(travel_time,newtimes):
     df_new_times = new_df.pivot(index='x',columns='y',values='t')
     # print(df_new_times)
 
+    # a zero travel-time leg (a load picked up or dropped at the depot
+    # city) makes no break nodes, so its labels may not appear in the
+    # pivot at all.  Reindex over the union with the incoming matrix
+    # so no node can drop out of the combined result
+    all_nodes = travel_time.index.union(df_new_times.index)
+    df_new_times = df_new_times.reindex(index=all_nodes,columns=all_nodes)
     df_new_times.update(travel_time)
     # print(df_new_times)
-    for idx in travel_time.index:
-        if not idx in df_new_times.index:
-            print('problems ahead.  missing',idx,'from',df_new_times.index,' Bailing out')
-        assert idx in df_new_times.index
+    # one set difference instead of a python loop testing each label
+    missing = travel_time.index.difference(df_new_times.index)
+    if len(missing) > 0:
+        print('problems ahead.  missing',list(missing),'from',df_new_times.index,' Bailing out')
+    assert len(missing) == 0
     # print(df_new_times.index)
     # print(travel_time.index)
     # print(df_new_times)
@@ -461,154 +476,3 @@ def aggregate_split_nodes(travel_time,newtimes):
 #     # travel_time = travel_time.fillna(sys.maxsize)
 #     # print(travel_time)
 #     return travel_time
-
-# def breaks_logic():
-#     node_visit_transit = {}
-#     for n in expanded_mm.index:
-#         node_visit_transit[n] = int(d.get_service_time(n))
-
-#     breaks = {}
-#     constraints = {}
-#     starts = []
-#     slacks = []
-#     ends   = []
-#     # grab ref to solver
-#     solver = routing.solver()
-
-#     # min_intervals = d.get_min_intervals(len(vehicles.vehicles))
-#     first_breaks = d.get_first_break(len(vehicles.vehicles),mm)
-#     print(first_breaks)
-
-#     for i in range(0,len(vehicles.vehicles)):
-#         print ( 'breaks for vehicle',i)
-#         breaks[i] = []
-#         constraints[i] = []
-#         active_start =  routing.ActiveVar(routing.Start(i))
-#         active_end = routing.VehicleVar(routing.End(i)) == i
-#         counting_end = active_end * count_dimension.CumulVar(routing.End(i))
-#         end_count_okay = counting_end > 1
-#         active_vehicle = end_count_okay
-#         time_start = time_dimension.CumulVar(routing.Start(i))
-#         slack_start = time_dimension.SlackVar(routing.Start(i))
-#         time_end = time_dimension.CumulVar(routing.End(i))
-#         must_start = active_vehicle*(time_start + slack_start + 11*60) # 11 hours later
-
-#         for pickup_node in first_breaks.keys():
-#             fb = first_breaks[pickup_node]
-#             # set up the origin details for constraints
-#             pickup_idx = manager.NodeToIndex(pickup_node)
-#             active_node = routing.ActiveVar(pickup_idx)
-#             same_vehicle_condition = active_node * routing.VehicleVar(pickup_idx) == i
-
-#             for j in range(0,len(fb)):
-#                 pair = fb[j]
-#                 jth_10hr_break = solver.FixedDurationIntervalVar(
-#                     pair[0],  # minimum start time
-#                     pair[1],  # maximum start time
-#                     10 * 60,      # duration of break is 10 hours
-#                     True,         # optional, condition on vehicle serving origin
-#                     '10hr break {} for vehicle {} serving {}'.format(j,i,pickup_node))
-#                 breaks[i].append(jth_10hr_break)
-#                 # first pickup constraint---breaks only relevant if first pickup
-#                 # due to split long nodes, count dimension might be 1 or 2
-#                 count_val = active_node * count_dimension.CumulVar(pickup_idx)
-#                 counted_visit = count_val >= 1
-#                 early_visit = count_val <= 2
-#                 break_active_condition = counted_visit*early_visit
-#                 # only use if this vehicle actually serves the intended node
-#                 cond_expr = solver.ConditionalExpression(
-#                     same_vehicle_condition,
-#                     jth_10hr_break.PerformedExpr() == break_active_condition,
-#                     1)
-#                 solver.Add(cond_expr>=1)
-#                 print('break',len(breaks[i])-1,'for serving node',pair[2])
-
-#         # now add additional breaks for whole of likely range
-#         # break up full time (horizon) into 10+11 hour ranges (drive 11, break 10)
-#         # not quite right, as the 14hr rule also comes into play
-
-#         need_breaks = math.floor(args.horizon / 60 / (10 + 11))
-#         #need_breaks -= min_intervals[i]
-#         # need_breaks = 0
-#         # follow_constraints = []
-#         # don't need first break, as that is already specified above
-#         # if i > 0:
-#         #     need_breaks = 2
-
-#         # # start counting from?
-#         # for intvl in range(len(fb),need_breaks):
-#         #     print(intvl)
-#         #     # break minimum start time is 0
-#         #     # break maximum start time is horizon - 10 hours
-
-#         #     min_start_time = (intvl)*(10 + 11)*60
-#         #     max_start_time = (intvl)*(10 + 11)*60 + 660
-
-#         #     if min_start_time > args.horizon - 660:
-#         #         break
-
-#         #     require_first_few = False
-#         #     #if intvl > 0:
-#         #     #    require_first_few = True
-#         #     # key on first break, but only required if time hasn't run out
-#         #     # next_10hr_break = solver.FixedDurationStartSyncedOnEndIntervalVar(
-#         #     #     breaks[i][-1],      # keyed to prior
-#         #     #     600,               # duration
-#         #     #     660     # offset
-#         #     # )
-#         #     next_10hr_break = solver.FixedDurationStartSyncedOnStartIntervalVar(
-#         #         breaks[i][0],      # keyed to first
-#         #         600,               # duration
-#         #         min_start_time     # offset
-#         #     )
-#         #     # next_10hr_break = solver.FixedDurationIntervalVar(
-#         #     #     min_start_intvar,  # maximum start time (11 hours after start)
-#         #     #     10 * 60,     # duration of break is 10 hours
-#         #     #     '10hr break {} for vehicle {}'.format(intvl,i))
-#         #     # next_10hr_break = solver.FixedDurationIntervalVar(
-#         #     #     min_start_time, # minimum start time
-#         #     #     max_start_time,  # maximum start time (11 hours after start)
-#         #     #     10 * 60,     # duration of break is 10 hours
-#         #     #     optional,       # optional?
-#         #     #     '{}th 10hr break for vehicle {}'.format(intvl,i))
-
-#         #     breaks[i].append(next_10hr_break)
-#         #     # constraints:
-#         #     # bip = next_10hr_break.MustBePerformed()
-#         #     # solver.Add(next_10hr_break.PerformedExpr()==True)
-#         #     # print('break must be performed = ',bip)
-#         #     # sync with preceding break
-#         #     #  this break starts 11h after end of prior
-#         #     # follow_after_constraint = next_10hr_break.StartsAfterEndWithDelay(
-#         #     #     breaks[i][intvl-1],
-#         #     #     660) # 11 hours times 60 minutes = 660
-#         #     # solver.Add(follow_after_constraint)
-
-
-#         #     if require_first_few:
-#         #         # conditional constraint.  If vehicle is done before start
-#         #         # time, then don't bother with this break
-
-#         #         # first, requirement that break is performed
-#         #         break_condition = next_10hr_break.PerformedExpr()==True
-
-#         #         # second, the timing.  If route is over, don't need break
-#         #         break_start = time_start + intvl*(11+10)*60
-#         #         time_condition =  break_start < time_end # break_start
-
-#         #         # use conditional expression
-#         #         expression = solver.ConditionalExpression(time_condition,
-#         #                                                   break_condition,
-#         #                                                   1)
-#         #         solver.AddConstraint(
-#         #             expression >= 1
-#         #         )
-
-#         #     # print(follow_after_constraint)
-#         #     # follow_constraints.append(follow_after_constraint)
-#         print(breaks[i])
-#         time_dimension.SetBreakIntervalsOfVehicle(
-#             breaks[i], i, node_visit_transit)
-
-#         # for follow_after_constraint  in follow_constraints:
-#         #     solver.Add(follow_after_constraint)
@@ -42,7 +42,7 @@ class Demand():
         # sum the two
         return num_long_breaks*long_break_time + num_short_breaks*short_break_time
 
-    def check_feasible(self, time_matrix, long_break, short_break, record):
+    def check_feasible(self, long_break, short_break, record):
         """Use travel time matrix to check that every trip is at least
             feasible as a one-off, that is, as a trip from depot to pickup
             to destination and back to depot, respecting both the horizon
@@ -54,14 +54,16 @@ class Demand():
         """
         feasible = True
         constraint = "None"
+        # the three travel-time legs are gathered from the matrix in
+        # one vectorized pass before the apply; see __init__
         # depot to origin
-        do_tt = time_matrix.loc[0, record.from_node]
+        do_tt = record.do_tt
 
         # origin to destination
-        od_tt = time_matrix.loc[record.from_node, record.to_node]
+        od_tt = record.od_tt
 
         # destination to depot
-        dd_tt = time_matrix.loc[record.to_node, 0]
+        dd_tt = record.dd_tt
 
         do_break_time = 0
         od_dd_break_time = 0
@@ -133,8 +135,23 @@ class Demand():
             long_break  = BN.BreakNode(-1, -1, 660, 0, 600, 660)
             short_break = BN.BreakNode(-1, -1, 480, 0,  30, 480)
 
+        # gather the three travel-time legs per record in one
+        # vectorized pass each, rather than three scalar .loc lookups
+        # per row inside check_feasible
+        tm = time_matrix.to_numpy()
+        from_pos = time_matrix.index.get_indexer(demand.from_node)
+        to_pos = time_matrix.index.get_indexer(demand.to_node)
+        # get_indexer maps missing nodes to -1, which would silently
+        # read the wrong matrix row.  Demand for a node that is not in
+        # the matrix is malformed input; keep it loud
+        assert (from_pos >= 0).all()
+        assert (to_pos >= 0).all()
+        depot_pos = time_matrix.index.get_loc(0)
+        demand['do_tt'] = tm[depot_pos, from_pos]
+        demand['od_tt'] = tm[from_pos, to_pos]
+        demand['dd_tt'] = tm[to_pos, depot_pos]
+
         morecols = demand.apply(partial(self.check_feasible,
-                                        time_matrix,
                                         long_break, short_break), axis=1)
 
         # print(morecols)
@@ -150,7 +167,19 @@ class Demand():
         demand.loc[feasible_index,'destination'] = last_origin + range(1,len(demand.index[feasible_index])+1)
         # so now, feasible pairs have origin, destination > 0
         # and infeasible pairs have origin = -1, destination = -1
+
+        # pin the node columns to int64.  The dtype after the range
+        # assignments above is platform dependent, and everything
+        # downstream (the equivalence index, batched NodeToIndex
+        # conversions via tolist) wants plain integers
+        demand['origin'] = demand.origin.astype(np.int64)
+        demand['destination'] = demand.destination.astype(np.int64)
         self.demand = demand
+        # feasibility is fixed at construction, so filter the feasible
+        # records just once.  The constraint and initial-route loops
+        # all iterate only these rows, and re-filtering the full table
+        # at each call site repeats the same boolean mask work
+        self.feasible = self.demand.loc[feasible_index,:]
 
         # slice up to create a lookup object
         origins = self.demand.loc[feasible_index,['from_node','origin','pickup_time']]
@@ -173,6 +202,15 @@ class Demand():
         self.destinations = destinations # ditto
         # can look up a map node given a model node
         self.equivalence = origins.append(destinations)
+        # per-column dict caches over the equivalence frame.  The
+        # scalar get_* accessors below are called per node in the
+        # model-build and reporting loops, and a dict hit is far
+        # cheaper than an index membership test plus .loc each time
+        eq_nodes = self.equivalence.index.view(int).tolist()
+        self._equivalence_cache = {
+            entry: dict(zip(eq_nodes,
+                            self.equivalence[entry].astype(int).tolist()))
+            for entry in ['mapnode','service_time','demand_index','demand']}
         self.break_nodes = None
         self.break_node_chains = None
 
@@ -180,9 +218,7 @@ class Demand():
         return self.equivalence.index.view(int)
 
     def _get_demand_entry(self,demand_node,entry,default):
-        if demand_node in self.equivalence.index:
-            return int(self.equivalence.loc[demand_node,entry])
-        return default
+        return self._equivalence_cache[entry].get(demand_node,default)
 
     def get_map_node(self,demand_node):
         if demand_node == 0:
@@ -198,6 +234,21 @@ class Demand():
     def get_demand(self,demand_node):
         return self._get_demand_entry(demand_node,'demand',0)
 
+    def get_service_times(self,demand_nodes):
+        """vectorized version of get_service_time.  Pass in an index (or
+        list) of demand nodes, get back an int64 array of service
+        times, with zero for nodes that have no demand entry (depot,
+        break nodes).
+
+        """
+        service = self.equivalence.service_time.reindex(demand_nodes)
+        return service.fillna(0).astype(np.int64).values
+
+    def get_demands(self,demand_nodes):
+        """vectorized version of get_demand, same idea as get_service_times"""
+        demands = self.equivalence.demand.reindex(demand_nodes)
+        return demands.fillna(0).astype(np.int64).values
+
     def generate_solver_space_matrix(self,matrix,horizon=None):
         """the input distance matrix is in "map space", meaning that nodes can
         repeat and so on.  The solver cannot work in that space, so
@@ -208,41 +259,45 @@ class Demand():
         """
         if(horizon == None):
             horizon=self.horizon
-        # iterate over each entry in the matrix, and make a new matrix
-        # with same data.
-        new_times = zeroed_trip_triplets(1)
-        new_matrix = {}
 
         # list of all origins
         self.demand['load_number'] = self.demand.index
-        feasible_idx = self.demand.feasible
-        def travtime(record):
-            record_times = zeroed_trip_triplets(5)
-            record_times[0]=(record.origin, record.origin,0.0)
-            record_times[1]=(record.destination, record.destination,0.0)
-            record_times[2]=(record.origin, record.destination,
-                             matrix.loc[record.from_node, record.to_node])
-            record_times[3]=(0,record.origin,
-                             matrix.loc[0, record.from_node])
-            record_times[4]=(record.destination,0,
-                             matrix.loc[record.to_node, 0])
-            return record_times
-
-
-        for idx in self.demand.index[feasible_idx]:
-            record = self.demand.loc[idx]
-            new_times = np.append(new_times,travtime(record),axis=0)
-            other_feasible = feasible_idx.copy()
-            other_feasible[idx] = False
-            if len(other_feasible[other_feasible])>0:
-                # link destination to all other feasible origins
-                other_times = [(record.destination, onode, matrix.loc[record.to_node,omap])
-                               for (onode,omap) in self.demand.loc[other_feasible,
-                                                         ['origin','from_node']].values]
-
-                triple = np.array(other_times,
-                                  dtype=[('x', np.int), ('y', np.int),('t',np.float)])
-                new_times = np.append(new_times,triple,axis=0)
+        feasible = self.feasible
+        num = len(feasible)
+        origins = feasible.origin.to_numpy()
+        destinations = feasible.destination.to_numpy()
+        # batch the map-space matrix lookups with fancy indexing, as
+        # in __init__, rather than one .loc per pair
+        mat = matrix.to_numpy()
+        from_pos = matrix.index.get_indexer(feasible.from_node)
+        to_pos = matrix.index.get_indexer(feasible.to_node)
+        assert (from_pos >= 0).all()
+        assert (to_pos >= 0).all()
+        depot_pos = matrix.index.get_loc(0)
+
+        # per record: the two self loops, origin to destination, depot
+        # to origin, and destination back to depot
+        zeros = np.zeros(num,dtype=np.int64)
+        xs = [origins, destinations, origins, zeros, destinations]
+        ys = [origins, destinations, destinations, origins, zeros]
+        ts = [np.zeros(num), np.zeros(num),
+              mat[from_pos,to_pos],
+              mat[depot_pos,from_pos],
+              mat[to_pos,depot_pos]]
+        if num > 1:
+            # link each destination to every other record's origin:
+            # one P x P gather, then keep the off-diagonal pairs
+            cross = mat[np.ix_(to_pos,from_pos)]
+            (dd,oo) = np.nonzero(~np.eye(num,dtype=bool))
+            xs.append(destinations[dd])
+            ys.append(origins[oo])
+            ts.append(cross[dd,oo])
+        x = np.concatenate(xs)
+        # keep the leading (0,0,0.0) triplet for the depot self loop
+        new_times = zeroed_trip_triplets(1 + len(x))
+        new_times['x'][1:] = x
+        new_times['y'][1:] = np.concatenate(ys)
+        new_times['t'][1:] = np.concatenate(ts)
         df = pd.DataFrame(new_times)
         df.drop_duplicates(inplace=True)
         df = df.pivot(index='x',columns='y',values='t')
@@ -270,15 +325,14 @@ class Demand():
         new_node = len(travel_times.index)
         # gb = breaks.split_break_node_generator(travel_times)
         # apply to demand pairs
-        feasible_index = self.demand.feasible
         # can't use apply here...it breaks
-        # new_times_nodes = self.demand.loc[feasible_index,:].apply(gb,axis=1,result_type='reduce')
+        # new_times_nodes = self.feasible.apply(gb,axis=1,result_type='reduce')
         self.break_nodes = {}
         self.break_node_chains = {}
         self.break_node_chains[0]={}
         new_times = zeroed_trip_triplets(0)
-        for idx in self.demand.index[feasible_index]:
-            record = self.demand.loc[idx]
+        # itertuples, not .loc: no Series built per record
+        for record in self.feasible.itertuples(index=False):
             pair = breaks.split_break_node(record,travel_times,new_node)
             # travel_times = breaks.aggregate_split_nodes(travel_times,pair[0])
             new_times = np.concatenate((new_times, pair[0]), axis=0)
@@ -324,35 +378,44 @@ class Demand():
 
 
         # new_node = len(travel_times.index)
-        destination_details = []
-        origin_details = []
-        for idx in self.demand.index[feasible_index]:
-            record = self.demand.loc[idx]
-            destination_details.append((record.destination,
-                                        record.earliest_destination,
-                                        record.origin))
-            origin_details.append((record.origin,
-                                   record.late))
+        # batch-extract the columns as python scalars rather than
+        # building a Series per record
+        feasible = self.feasible
+        destination_details = list(zip(feasible.destination.tolist(),
+                                       feasible.earliest_destination.tolist(),
+                                       feasible.origin.tolist()))
+        origin_details = list(zip(feasible.origin.tolist(),
+                                  feasible.late.tolist()))
+        # the matrix is directional (break nodes split arcs one way),
+        # so there is no symmetric triangle to skip here.  Instead,
+        # gather each destination's travel times to all origins in one
+        # fancy-indexed pass and run both feasibility checks
+        # vectorized, so the python loop only touches pairs that
+        # survive
+        origin_nodes = [oo[0] for oo in origin_details]
+        origin_lates = np.array([oo[1] for oo in origin_details])
         for dd in destination_details:
             didx = dd[0]
             # moretimes = []
-            for oo in origin_details:
+            # what is min time to destination, and from then, can
+            # we get to origin before horizon, and before each
+            # origin's own pickup horizon?
+            tts = travel_times.loc[didx,origin_nodes].to_numpy()
+            arrivals = dd[1] + tts
+            possible = (arrivals <= self.horizon) & (arrivals <= origin_lates)
+            for (oo,tt,ok) in zip(origin_details,tts.tolist(),
+                                  possible.tolist()):
                 oidx = oo[0]
                 if dd[2] == oidx:
                     # that means traveling back to origin, which is impossible
                     continue
-                # what is min time to destination, and from then, can
-                # we get to origin before horizon?
-                tt = travel_times.loc[didx,oidx]
                 assert not np.isnan(tt)
-                if dd[1] + tt > self.horizon:
-                    if self.debug:
-                        print("can't get from",didx,"to",oidx,"before horizon")
-                    continue
-                # check that can get to next origin before its time horizon ends
-                if dd[1] + tt > oo[1]:
+                if not ok:
                     if self.debug:
-                        print("can't get from",didx,"to",oidx,"before origin pickup horizon",oo[1])
+                        if dd[1] + tt > self.horizon:
+                            print("can't get from",didx,"to",oidx,"before horizon")
+                        else:
+                            print("can't get from",didx,"to",oidx,"before origin pickup horizon",oo[1])
                     continue
                 # trip chain is possible, so split destination to origin
                 pair = breaks.break_node_splitter(dd[0],oo[0],tt,new_node)
@@ -394,12 +457,17 @@ class Demand():
                          routing,
                          drive_dimension,
                          short_break_dimension,
-                         drive_dimension_start_value
+                         drive_dimension_start_value,
+                         n2i=None
     ):
         solver = routing.solver()
-        o_idx = manager.NodeToIndex(origin)
-        d_idx = manager.NodeToIndex(destination)
-        print(origin,o_idx,destination,d_idx)
+        # prefer the precomputed node to index map if the caller has one
+        if n2i is not None:
+            o_idx = n2i[origin]
+            d_idx = n2i[destination]
+        else:
+            o_idx = manager.NodeToIndex(origin)
+            d_idx = manager.NodeToIndex(destination)
         origin_active =routing.ActiveVar(o_idx)
         dest_active =routing.ActiveVar(d_idx)
 
@@ -409,27 +477,25 @@ class Demand():
         origin_short = origin_active*short_break_dimension.CumulVar(o_idx)
         dest_short = dest_active*short_break_dimension.CumulVar(d_idx)
 
-        # print(origin_drive,'>=',origin_active,'*',drive_dimension_start_value)
-        solver.AddConstraint(origin_drive >= origin_active*drive_dimension_start_value)
+        # build each active*start_value product expression once; the
+        # bounds below all reuse them rather than minting a fresh
+        # IntExpr per constraint
+        origin_floor = origin_active*drive_dimension_start_value
+        dest_floor = dest_active*drive_dimension_start_value
+
+        solver.AddConstraint(origin_drive >= origin_floor)
 
-        # print(origin_drive,'<=',origin_active,'*',drive_dimension_start_value+660)
-        solver.AddConstraint(origin_drive < origin_active*(drive_dimension_start_value)+660)
+        solver.AddConstraint(origin_drive < origin_floor+660)
 
-        # print(dest_drive,'>=',dest_active,'*',drive_dimension_start_value)
-        solver.AddConstraint(dest_drive >= dest_active*drive_dimension_start_value)
+        solver.AddConstraint(dest_drive >= dest_floor)
 
-        # print(dest_drive,'<=',dest_active,'*',drive_dimension_start_value+660)
-        solver.AddConstraint(dest_drive < dest_active*(drive_dimension_start_value)+660)
+        solver.AddConstraint(dest_drive < dest_floor+660)
 
         # same type of constraints for short drive dimension, except 8 hrs not 11 hrs
 
-        # print(origin_short,'<',origin_active,'*',drive_dimension_start_value+8*60)
-        solver.AddConstraint(origin_short < origin_active*(drive_dimension_start_value)+(8*60))
-        # print(origin_short,'>=',origin_active,'*',drive_dimension_start_value)
-        solver.AddConstraint(origin_short >= origin_active*drive_dimension_start_value)
+        solver.AddConstraint(origin_short < origin_floor+(8*60))
+        solver.AddConstraint(origin_short >= origin_floor)
 
-        # print(dest_short,'<',dest_active,'*',drive_dimension_start_value+8*60)
-        solver.AddConstraint(dest_short < dest_active*(drive_dimension_start_value)+(8*60))
+        solver.AddConstraint(dest_short < dest_floor+(8*60))
 
-        # print(dest_short,'>=',dest_active,'*',drive_dimension_start_value)
-        solver.AddConstraint(dest_short >= dest_active*drive_dimension_start_value)
+        solver.AddConstraint(dest_short >= dest_floor)
@@ -9,10 +9,8 @@ import itertools as iter
 
 def create_demand_callback(nodes,demand):
     """ create a callback function for demand """
-    _demand = {}
-    for idx in range(0,len(nodes)):
-        node = nodes[idx]
-        _demand[idx] = demand.get_demand(node)
+    node_demands = demand.get_demands(nodes)
+    _demand = dict(zip(range(0,len(nodes)),node_demands.tolist()))
     print('size of demand matrix is ',len(_demand))
     def demand_callback(manager, index):
         """Returns the demand at the index, if defined, or zero."""
@@ -32,13 +30,39 @@ def lookup_function_generator(_total_time):
         # Convert from routing variable Index to distance matrix NodeIndex.
         from_node = manager.IndexToNode(from_index)
         to_node = manager.IndexToNode(to_index)
-        # print('drive time',from_node,to_node,_total_time[from_node][to_node])
-        return _total_time[from_node][to_node]
+        # print('drive time',from_node,to_node,_total_time[from_node,to_node])
+        # plain python int, as the solver calls this millions of times
+        # and chokes on numpy scalar types
+        return int(_total_time[from_node,to_node])
 
     # return the callback, which will need to be set up with partial
     return lookup_function
 
 
+def manager_bound_lookup(manager,_total_time):
+    """like lookup_function_generator, but binds the manager's
+       IndexToNode method to a local once.  That saves an attribute
+       lookup per invocation, which adds up over the millions of arc
+       evaluations local search performs.
+
+    """
+    i2n = manager.IndexToNode
+    def lookup_function(from_index,to_index):
+        return int(_total_time[i2n(from_index),i2n(to_index)])
+
+    return lookup_function
+
+
+
+def nan_penalty(matrix):
+    """sentinel cost for undefined arcs.  Arcs with no entry in the
+       matrix are not pruned from the model; they just get a cost so
+       much larger than any real arc that cost minimization never picks
+       them.  That keeps the constraint model small.
+
+    """
+    return int(10000000 * matrix.max().max())
+
 
 def create_dist_callback(dist_matrix,
                          demand):
@@ -46,13 +70,47 @@ def create_dist_callback(dist_matrix,
     # dist matrix is now in model space, not map space
     # preprocess travel and service dist to speed up solver
 
-    max_dist = dist_matrix.max().max()
-    penalty_dist =  int(10000000 * max_dist)
-    _total_dist = dist_matrix.fillna(penalty_dist).values
+    penalty_dist = nan_penalty(dist_matrix)
+    # a dense, C-contiguous int64 array keyed by solver-space node id,
+    # so each lookup is a couple of C-level array loads
+    _total_dist = np.ascontiguousarray(dist_matrix.fillna(penalty_dist).values,
+                                       dtype=np.int64)
 
     return lookup_function_generator(_total_dist)
 
 
+def time_matrix2(travel_minutes_matrix,
+                 demand):
+    """Total time matrix, version 2
+
+       Same preprocessing as create_time_callback2, but returns the
+       dense int64 matrix itself rather than a callback closed over
+       it.  The matrix is keyed by solver-space node id, so it can be
+       handed straight to RegisterTransitMatrix and the solver never
+       has to call back into python for an arc cost.
+
+    """
+    # preprocess travel and service time to speed up solver
+    size = len(travel_minutes_matrix)
+    tmm_index = travel_minutes_matrix.index
+
+    # per-node service time in one vectorized pass, not one pandas
+    # lookup per node
+    node_service = demand.get_service_times(tmm_index).astype(np.float64)
+    # break nodes "serve" their break duration instead
+    if demand.break_nodes:
+        for node,bn in demand.break_nodes.items():
+            node_service[node] = bn.break_time
+
+    # service time is determined by from node, and applies only on
+    # defined, non-diagonal arcs
+    defined = travel_minutes_matrix.notna().values & ~np.eye(size,dtype=bool)
+    service_time = np.where(defined,node_service[:,None],0.0)
+
+    _total_time = gen_total_time(service_time,travel_minutes_matrix)
+    return _total_time
+
+
 def create_time_callback2(travel_minutes_matrix,
                           demand):
     """Time callback version 2
@@ -63,38 +121,25 @@ def create_time_callback2(travel_minutes_matrix,
        taking the break.
 
     """
-    # preprocess travel and service time to speed up solver
-    size = len(travel_minutes_matrix)
-
-    service_time = np.zeros((size,size))
-    notna = travel_minutes_matrix.notna()
-    tmm_index = travel_minutes_matrix.index
-    # service time is determined by from node
-    for o_idx in tmm_index:
-        o_sv = demand.get_service_time(o_idx)
-        o_bk = demand.get_break_node(o_idx)
-        if o_bk:
-            o_sv = o_bk.break_time
-        for d_idx in tmm_index[notna.loc[o_idx,:]]:
-            if o_idx != d_idx:
-                service_time[o_idx,d_idx] = o_sv
-
-    _total_time = gen_total_time(service_time,travel_minutes_matrix)
-    return lookup_function_generator(_total_time)
+    return lookup_function_generator(time_matrix2(travel_minutes_matrix,
+                                                  demand))
 
 
 def gen_total_time(service,times):
-    max_time = times.max().max()
-    penalty_time =  int(10000000 * max_time)
+    penalty_time = nan_penalty(times)
     df_service_time = pd.DataFrame(service)
-    _total_time = (df_service_time + times).fillna(penalty_time).values
+    # as with create_dist_callback, store a dense C-contiguous int64
+    # array so per-arc lookups never touch pandas
+    _total_time = np.ascontiguousarray(
+        (df_service_time + times).fillna(penalty_time).values,
+        dtype=np.int64)
     return _total_time
 
-def create_drive_callback(travel_minutes_matrix,
-                          demand,
-                          period,
-                          break_time):
-    """create a callback function for drivetime.  presumes that
+def drive_time_matrix(travel_minutes_matrix,
+                      demand,
+                      period,
+                      break_time):
+    """build the total drive-time matrix.  presumes that
        travel_minutes_matrix is in solver space, not map space (has
        been passed through demand.generate_solver_space_matrix.  Also,
        create negative demands (unload drive time) at break nodes, but
@@ -111,31 +156,45 @@ def create_drive_callback(travel_minutes_matrix,
     # print(node_demand_service_list)
 
     size = len(travel_minutes_matrix)
-    service_time = np.zeros((size,size))
-    notna = travel_minutes_matrix.notna()
-    tmm_index = travel_minutes_matrix.index
-    # service time is determined by from node
-    for o_idx in tmm_index:
-        o_sv = 0
-        o_bk = demand.get_break_node(o_idx)
-        if o_bk:
+
+    # per-node drive-time restore, then broadcast across each row.
+    # same approach as time_matrix2: one vectorized pass instead of a
+    # python loop over all N^2 cells
+    node_restore = np.zeros(size)
+    if demand.break_nodes:
+        for node,bn in demand.break_nodes.items():
             # drive callback only wants to know breaks of 600
-            if o_bk.break_time >= break_time:
-                o_sv = o_bk.drive_time_restore()
-        # again, from node is important
-        for d_idx in tmm_index[notna.loc[o_idx,:]]:
-            if o_idx != d_idx:
-                service_time[o_idx,d_idx] = o_sv
+            if bn.break_time >= break_time:
+                node_restore[node] = bn.drive_time_restore()
+
+    # restore is determined by from node, and applies only on defined,
+    # non-diagonal arcs
+    defined = travel_minutes_matrix.notna().values & ~np.eye(size,dtype=bool)
+    service_time = np.where(defined,node_restore[:,None],0.0)
 
     _total_time = gen_total_time(service_time,travel_minutes_matrix)
-    return lookup_function_generator(_total_time)
+    return _total_time
 
 
-def create_short_break_callback(travel_minutes_matrix,
+def create_drive_callback(travel_minutes_matrix,
+                          demand,
+                          period,
+                          break_time):
+    """create a callback function for drivetime.  See drive_time_matrix
+       for the details.
+
+    """
+    return lookup_function_generator(drive_time_matrix(travel_minutes_matrix,
+                                                       demand,
+                                                       period,
+                                                       break_time))
+
+
+def short_break_time_matrix(travel_minutes_matrix,
                           demand,
                           period,
                           break_time):
-    """create a callback function for short_breaktime.  presumes that
+    """build the total short-break-time matrix.  presumes that
        travel_minutes_matrix is in solver space, not map space (has
        been passed through demand.generate_solver_space_matrix.  Also,
        create negative demands (unload short_break time) at break nodes, but
@@ -146,21 +205,16 @@ def create_short_break_callback(travel_minutes_matrix,
         period = period * -1
     # preprocess travel and service time to speed up solver
     size = len(travel_minutes_matrix)
-    service_time = np.zeros((size,size))
-    notna = travel_minutes_matrix.notna()
-    tmm_index = travel_minutes_matrix.index
 
-    # service time is determined by from node
-    for o_idx in tmm_index:
-        o_sv = 0
-        value = 0
-        o_bk = demand.get_break_node(o_idx)
-        if o_bk:
+    # per-node restore value broadcast across each row, same vectorized
+    # pattern as drive_time_matrix
+    node_restore = np.zeros(size)
+    if demand.break_nodes:
+        for node,bn in demand.break_nodes.items():
             # short break callback gets benefits from both short and long breaks
-            if o_bk.break_time >= break_time:
-                o_sv = o_bk.drive_time_restore()
-                value = o_sv
-                if o_sv < -period:
+            if bn.break_time >= break_time:
+                value = bn.drive_time_restore()
+                if value < -period:
                     # after trying a few things, it is never true that
                     # a long break happens without a preceding short
                     # break.  Therefore, if this is a long break, an
@@ -168,15 +222,27 @@ def create_short_break_callback(travel_minutes_matrix,
                     # back on the counter by 480, so here I only want
                     # to push it back another 3 hours (to get it
                     # aligned with the 11 hr long break timing
-                    value = -3*60 # same as o_sv - (-period)
+                    value = -3*60 # same as value - (-period)
+                node_restore[node] = value
 
-        # bail out if just going to assign 0
-        if o_sv != 0:
-            # again, from node is important, but here have to consider if
-            # moving from break to break
-            for d_idx in tmm_index[notna.loc[o_idx,:]]:
-                if o_idx != d_idx:
-                    service_time[o_idx,d_idx] = value
+    # restore is determined by from node, and applies only on defined,
+    # non-diagonal arcs
+    defined = travel_minutes_matrix.notna().values & ~np.eye(size,dtype=bool)
+    service_time = np.where(defined,node_restore[:,None],0.0)
 
     _total_time = gen_total_time(service_time,travel_minutes_matrix)
-    return lookup_function_generator(_total_time)
+    return _total_time
+
+
+def create_short_break_callback(travel_minutes_matrix,
+                          demand,
+                          period,
+                          break_time):
+    """create a callback function for short_breaktime.  See
+       short_break_time_matrix for the details.
+
+    """
+    return lookup_function_generator(short_break_time_matrix(travel_minutes_matrix,
+                                                             demand,
+                                                             period,
+                                                             break_time))
@@ -22,7 +22,7 @@ def cycle_goal(origin,destination):
 def goal_okay(d,t,accumulators,od):
     # print("check if it is okay to travel to the goal directly, no breaks")
     # see if break conditions will be violated
-    tt = t.loc[od['prior'],od['goal']]
+    tt = t.at[od['prior'],od['goal']]
     if np.isnan(tt):
         # print('tt undefined, not possible')
         return False
@@ -60,7 +60,8 @@ def long_from_node(d,tt,accumulators,od):
 
 
 def move_to_(t,accumulators,origin,dest):
-    tt = t.loc[origin,dest]
+    # .at, not .loc: scalar lookup without the indexing machinery
+    tt = t.at[origin,dest]
     accumulators['travel_time'] += tt
     accumulators['long_time'] += tt
     accumulators['short_time'] += tt
@@ -91,7 +92,8 @@ def move_to_break(d,t,accumulators,od,break_size):
     return possible
 
 def move_to_long(d,t,accumulators,od):
-    print('move from current to a long break node')
+    if od['debug']:
+        print('move from current to a long break node')
     brk = move_to_break(d,t,accumulators,od,600)
     # adjust accumulators to account for break
     accumulators['long_time'] += brk.drive_time_restore()
@@ -100,7 +102,8 @@ def move_to_long(d,t,accumulators,od):
 
 
 def move_to_short(d,t,accumulators,od):
-    print('move from current to a short break node')
+    if od['debug']:
+        print('move from current to a short break node')
     brk = move_to_break(d,t,accumulators,od,30)
     accumulators['short_time'] += brk.drive_time_restore()
     return brk.node
@@ -137,15 +140,20 @@ def decide_next(d,t,accumulators,od):
 def move_along(d,t,accumulator,od):
     # setup od object?
     reached = decide_next(d,t,accumulator,od)
-    print('reached',reached)
+    if od['debug']:
+        print('reached',reached)
     if reached==od['goal']:
         next_goal = od['cycler'](reached)
         if next_goal != -1:
-            print('reached regular node')
             # have not reached depot
             # cycle breaks
             break_list = d.get_break_node_chain(od['goal'],next_goal)
-            print(break_list)
+            if break_list is None:
+                # zero travel-time leg (depot-city load): no breaks
+                break_list = []
+            if od['debug']:
+                print('reached regular node')
+                print(break_list)
             breaks = [d.get_break_node(bk) for bk in break_list]
             od['goal'] = next_goal
             od['breaks'] = breaks
@@ -154,24 +162,28 @@ def move_along(d,t,accumulator,od):
 
         else:
             # reached depot, all done
-            print('reached depot, all done')
+            if od['debug']:
+                print('reached depot, all done')
             return False
     return reached
 
-def initial_routes_2(d,v,t):
+def initial_routes_2(d,v,t,debug=False):
     # assign one route per vehicle
     veh = 0
-    feasible_idx = d.demand.feasible
     trip_chains = {}
 
-    for idx in d.demand.index[feasible_idx]:
+    # itertuples, not .loc: no Series built per record
+    for record in d.feasible.itertuples():
         if veh >= len(v):
             break
-        print('demand record',idx,'vehicle',veh)
+        if debug:
+            print('demand record',record.Index,'vehicle',veh)
 
-        record = d.demand.loc[idx,:]
         trip_chain = []
         break_list = d.get_break_node_chain(0,record.origin)
+        if break_list is None:
+            # depot-city pickup: zero travel time, no break chain
+            break_list = []
         breaks = [d.get_break_node(bk) for bk in break_list]
         od = {'prior': 0,
               'prior_break': None,
@@ -179,19 +191,18 @@ def initial_routes_2(d,v,t):
               'cycler': cycle_goal(record.origin,record.destination),
               'goal': record.origin,
               'break_index':0,
-              'breaks': breaks
+              'breaks': breaks,
+              'debug': debug
         }
         accumulators = {'travel_time': 0,
                         'long_time': 0,
                         'short_time': 0
         }
 
-        # debugging
-        break_list.append(0)
-        break_list.append(record.origin)
-        break_list.append(record.destination)
-        print(break_list)
-        print(t.loc[break_list,break_list])
+        if debug:
+            break_list = break_list + [0,record.origin,record.destination]
+            print(break_list)
+            print(t.loc[break_list,break_list])
 
         reached = move_along(d,t,accumulators,od)
         while reached:
@@ -442,16 +453,15 @@ def initial_routes_no_breaks(demand,vehicles,time_matrix,
     # assign one route per vehicle
     veh = 0
     prior = 0
-    feasible_idx = demand.demand.feasible
     trip_chains = {}
     travel_times = {}
 
-    for idx in demand.demand.index[feasible_idx]:
+    # itertuples, not .loc: no Series built per record
+    for record in demand.feasible.itertuples():
         if veh >= len(vehicles):
             break
         reached_depot = False
         trip_chain = []
-        record = demand.demand.loc[idx,:]
         if debug:
             print (record)
         prior = 0 # depot node
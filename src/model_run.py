@@ -1,14 +1,18 @@
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
+import concurrent.futures
+import os
 import numpy as np
-from functools import partial
 import evaluators as E
 
 def use_nodes(record,d):
     nodes = [0,record.origin,record.destination]
-    nodes.extend(d.get_break_node_chain(0,record.origin))
-    nodes.extend(d.get_break_node_chain(record.origin,record.destination))
-    nodes.extend(d.get_break_node_chain(record.destination,0))
+    for chain in (d.get_break_node_chain(0,record.origin),
+                  d.get_break_node_chain(record.origin,record.destination),
+                  d.get_break_node_chain(record.destination,0)):
+        # a zero travel-time leg (depot-city load) has no break chain
+        if chain:
+            nodes.extend(chain)
     return nodes
 
 
@@ -19,6 +23,12 @@ count_dimension_name = 'count'
 drive_dimension_name = 'drive'
 short_break_dimension_name = 'break'
 
+# DefaultRoutingSearchParameters re-derives the whole proto from the
+# library defaults every call.  Build the template once at import;
+# setup_params copies it per solve, which matters when multistart or
+# decomposition sets up many models in a row
+default_search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+
 
 
 def get_route(v,assignment,routing,manager):
@@ -31,29 +41,69 @@ def get_route(v,assignment,routing,manager):
         index = assignment.Value(routing.NextVar(index))
     return initial_route
 
-def setup_params(timelimit):
-    parameters = pywrapcp.DefaultRoutingSearchParameters()
-    parameters.first_solution_strategy = (
-        routing_enums_pb2.FirstSolutionStrategy.PARALLEL_CHEAPEST_INSERTION)
-        # routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC)
-        # routing_enums_pb2.FirstSolutionStrategy.ALL_UNPERFORMED)
-        # routing_enums_pb2.FirstSolutionStrategy.LOCAL_CHEAPEST_INSERTION)
-
-    # Disabling path Large Neighborhood Search is the default behaviour.  enable
-    parameters.local_search_operators.use_path_lns = pywrapcp.BOOL_TRUE
-    parameters.local_search_operators.use_inactive_lns = pywrapcp.BOOL_TRUE
+def setup_params(timelimit,first_solution_strategy=None,metaheuristic=None,
+                 gls_lambda=None):
+    # copy the module-level template rather than re-deriving defaults
+    parameters = type(default_search_parameters)()
+    parameters.CopyFrom(default_search_parameters)
+    if first_solution_strategy is None:
+        # parallel cheapest insertion spends most of its effort
+        # reshuffling infeasible partial routes on pickup/delivery plus
+        # time window problems.  path cheapest arc gets to a feasible
+        # first solution fast and lets guided local search do the
+        # improving
+        first_solution_strategy = (
+            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC)
+            # routing_enums_pb2.FirstSolutionStrategy.PARALLEL_CHEAPEST_INSERTION)
+            # routing_enums_pb2.FirstSolutionStrategy.ALL_UNPERFORMED)
+            # routing_enums_pb2.FirstSolutionStrategy.LOCAL_CHEAPEST_INSERTION)
+    parameters.first_solution_strategy = first_solution_strategy
+
+    # guided local search can climb back out of the local optimum that
+    # the default descent stops at, and keeps improving until the time
+    # limit runs out.  It subsumes the manual path/inactive LNS toggles
+    # this used to set
+    if metaheuristic is None:
+        metaheuristic = (
+            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH)
+    parameters.local_search_metaheuristic = metaheuristic
+    if gls_lambda is None:
+        gls_lambda = 0.1
+    parameters.guided_local_search_lambda_coefficient = gls_lambda
     # Routing: forbids use of TSPOpt neighborhood,
     # parameters.local_search_operators.use_tsp_opt = pywrapcp.BOOL_FALSE
     # set a time limit
     parameters.time_limit.seconds =  timelimit * 60  # timelimit minutes
     # sometimes helps with difficult solutions
     parameters.lns_time_limit.seconds = 10000  # 10000 milliseconds
+    # full cascade propagation is expensive and not worth it here; pin
+    # it off explicitly rather than relying on the library default
+    parameters.use_full_propagation = False
+    # when A/B testing the SAVINGS first solution strategy, keep only
+    # the cheapest tenth of candidate arcs per node.  on bigger
+    # networks the full savings list is quadratic in nodes and mostly
+    # junk arcs
+    if first_solution_strategy == (
+            routing_enums_pb2.FirstSolutionStrategy.SAVINGS):
+        parameters.savings_parameters.neighbors_ratio = 0.1
     # i think this is the default
     # parameters.use_light_propagation = False
     # set to true to see the dump of search iterations
     parameters.log_search = pywrapcp.BOOL_TRUE
     return parameters
 
+def node_index_cache(manager,nodes):
+    """Precompute NodeToIndex for every non-depot solver node.
+
+       The constraint loops hit the same nodes over and over, and each
+       NodeToIndex call is a python to C++ crossing.  One dict lookup
+       is cheaper.  Skips the depot (node 0), which the loops handle
+       via Start and End instead.
+
+    """
+    return {int(node): manager.NodeToIndex(int(node))
+            for node in nodes if node != 0}
+
 def unset_times(t,demand_subset):
     t = t.copy()
     l = len(t.index)
@@ -69,25 +119,32 @@ def breaks_at_nodes_constraints(d,
                                 time_matrix,
                                 manager,
                                 routing,
-                                base_value):
+                                base_value,
+                                n2i=None):
 
+    if n2i is None:
+        n2i = node_index_cache(manager,time_matrix.index)
     solver = routing.solver()
     time_dimension = routing.GetDimensionOrDie(time_dimension_name)
     drive_dimension = routing.GetDimensionOrDie(drive_dimension_name)
     short_break_dimension = routing.GetDimensionOrDie(short_break_dimension_name)
     count_dimension = routing.GetDimensionOrDie(count_dimension_name)
 
-    feasible_index = d.demand.feasible
-    for idx in d.demand.index[feasible_index]:
-        record = d.demand.loc[idx,:]
+    # dense numpy view plus a label to position map, so the existence
+    # check in the loop skips pandas label resolution
+    tm_arr = time_matrix.to_numpy()
+    tm_pos = {label:pos for (pos,label) in enumerate(time_matrix.index)}
+
+    for record in d.feasible.itertuples(index=False):
         # double check that is possible (in case just solving a limited set
-        if np.isnan(time_matrix.loc[record.origin,record.destination]):
+        if np.isnan(tm_arr[tm_pos[record.origin],tm_pos[record.destination]]):
             continue
         d.break_constraint(record.origin,record.destination,
                            manager,routing,
                            drive_dimension,
                            short_break_dimension,
-                           base_value
+                           base_value,
+                           n2i
         )
 
     # constraints on return to depot, otherwise we just collect
@@ -114,12 +171,18 @@ def setup_model(d,t,v):
         num_nodes,
         len(v),
         v[0].depot_index)
-    routing = pywrapcp.RoutingModel(manager)
-    time_callback = E.create_time_callback2(t, d)
-    demand_callback = E.create_demand_callback(t.index,d)
-
-    transit_callback_index = routing.RegisterTransitCallback(
-        partial(time_callback, manager)
+    # the matrices are static, so let the solver cache every arc value
+    # the remaining python callbacks (drive, short break) produce
+    # instead of re-invoking them during local search
+    model_parameters = pywrapcp.DefaultRoutingModelParameters()
+    model_parameters.max_callback_cache_size = num_nodes * num_nodes
+    routing = pywrapcp.RoutingModel(manager,model_parameters)
+    time_matrix = E.time_matrix2(t, d)
+
+    # hand the whole matrix to the solver, which stores it in C++ and
+    # never has to cross back into python per arc evaluation
+    transit_callback_index = routing.RegisterTransitMatrix(
+        time_matrix.tolist()
     )
 
     routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
@@ -142,9 +205,10 @@ def setup_model(d,t,v):
     time_dimension = routing.GetDimensionOrDie(time_dimension_name)
     # time_dimension.SetGlobalSpanCostCoefficient(100)
 
-    # capacity/demand
-    demand_evaluator_index = routing.RegisterUnaryTransitCallback(
-        partial(demand_callback, manager))
+    # capacity/demand.  like the time matrix above, hand the solver the
+    # whole demand vector so it never calls back into python per node
+    demand_evaluator_index = routing.RegisterUnaryTransitVector(
+        d.get_demands(t.index).tolist())
     vehicle_capacities = [veh.capacity for veh in v]
     routing.AddDimensionWithVehicleCapacity(
         demand_evaluator_index,
@@ -156,59 +220,93 @@ def setup_model(d,t,v):
 
     return (num_nodes,manager,routing)
 
-def break_nodes_time_windows(d,demand_subset,manager,routing):
+def break_nodes_time_windows(d,demand_subset,manager,routing,n2i=None):
     # Pickup & Delivery, plus time window
+    if n2i is None:
+        n2i = node_index_cache(manager,demand_subset)
     time_dimension = routing.GetDimensionOrDie(time_dimension_name)
-    for node in demand_subset:
+    # fetch all node demands in one vectorized pass, rather than one
+    # pandas lookup per dummy node
+    node_list = [int(node) for node in demand_subset]
+    demands = d.get_demands(node_list)
+    # bind the dimension and model methods as locals, as in
+    # node_index_cache: each attribute resolution is a SWIG crossing,
+    # and this loop repeats them per dummy node
+    cumul_fn = time_dimension.CumulVar
+    slack_fn = time_dimension.SlackVar
+    add_to_assignment = routing.AddToAssignment
+    for (node,node_demand) in zip(node_list,demands):
         # skip depot nodes---handled in vehicle time windows
         if node == 0:
             continue
         # also skip nodes with non zero demand (handled above)
-        if d.get_demand(node) != 0:
+        if node_demand != 0:
             continue
 
         # this is a dummy node, not a pickup (demand = 1) not a dropoff (-1)
-        index = manager.NodeToIndex(node)
+        index = n2i[node]
         # set maximal time window
-        time_dimension.CumulVar(index).SetRange(0,d.horizon)
-        routing.AddToAssignment(time_dimension.SlackVar(index))
+        cumul_fn(index).SetRange(0,d.horizon)
+        add_to_assignment(slack_fn(index))
 
 
-def pick_deliver_constraints(d,t,manager,routing):
+def pick_deliver_constraints(d,t,manager,routing,n2i=None,
+                             narrow_destination=False):
     # Pickup & Delivery, plus time window
+    if n2i is None:
+        n2i = node_index_cache(manager,t.index)
     time_dimension = routing.GetDimensionOrDie(time_dimension_name)
-    for idx in d.demand.index:
-        record = d.demand.loc[idx]
-        # print('origin to dest',record.origin,record.destination)
-
-        if not record.feasible:
-            continue
-        if np.isnan(t.loc[record.origin,record.destination]):
-            # print('origin to dest is nan',record.origin,record.destination,
-            #      t.loc[record.origin,record.destination])
+    solver = routing.solver()
+    # batch-extract the columns once as plain python ints, so the loop
+    # body below is nothing but solver calls
+    feasible = d.feasible
+    origins = feasible.origin.astype(int).tolist()
+    destinations = feasible.destination.astype(int).tolist()
+    earlys = feasible.early.astype(int).tolist()
+    lates = feasible.late.astype(int).tolist()
+    # earliest possible arrival at the destination, computed during the
+    # feasibility check.  used to clip the dropoff window below
+    dest_earlys = feasible.earliest_destination.astype(int).tolist()
+    # as in breaks_at_nodes_constraints, check arc existence against a
+    # dense numpy view rather than .loc per pair
+    t_arr = t.to_numpy()
+    t_pos = {label:pos for (pos,label) in enumerate(t.index)}
+    # bind the hot methods as locals so the loop body is nearly pure C
+    # calls, no repeated attribute resolution through SWIG
+    cumul_fn = time_dimension.CumulVar
+    slack_fn = time_dimension.SlackVar
+    add_to_assignment = routing.AddToAssignment
+    add_pickup_delivery = routing.AddPickupAndDelivery
+    vehicle_var = routing.VehicleVar
+    solver_add = solver.Add
+    for (origin,destination,early,late,dest_early) in zip(origins,destinations,
+                                                          earlys,lates,
+                                                          dest_earlys):
+        if np.isnan(t_arr[t_pos[origin],t_pos[destination]]):
+            # can happen when just solving a limited set
             continue
-        pickup_index = manager.NodeToIndex(record.origin)
-        delivery_index = manager.NodeToIndex(record.destination)
-        routing.AddPickupAndDelivery(pickup_index, delivery_index)
-        routing.solver().Add(
-            routing.VehicleVar(pickup_index) ==
-            routing.VehicleVar(delivery_index))
-        routing.solver().Add(
-            time_dimension.CumulVar(pickup_index) <=
-            time_dimension.CumulVar(delivery_index))
+        pickup_index = n2i[origin]
+        delivery_index = n2i[destination]
+        add_pickup_delivery(pickup_index, delivery_index)
+        solver_add(
+            vehicle_var(pickup_index) ==
+            vehicle_var(delivery_index))
+        solver_add(
+            cumul_fn(pickup_index) <=
+            cumul_fn(delivery_index))
         # [START time_window_constraint]
-        early = int(record.early)
-        late = int(record.late)
-        time_dimension.CumulVar(pickup_index).SetRange(early, late)
-        routing.AddToAssignment(time_dimension.SlackVar(pickup_index))
+        cumul_fn(pickup_index).SetRange(early, late)
+        add_to_assignment(slack_fn(pickup_index))
         # and  add simulation-wide time windows (slack) for delivery nodes,
-        dropoff_index = manager.NodeToIndex(record.destination)
-        # tt = t.loc[record.origin,record.destination]
-        # just set dropoff time window same as 0, horizon
-        early = 0
-        late = d.horizon
-        time_dimension.CumulVar(dropoff_index).SetRange(early, late)
-        routing.AddToAssignment(time_dimension.SlackVar(dropoff_index))
+        # just set dropoff time window same as 0, horizon.  narrowing
+        # the window to the earliest possible arrival shrinks the cumul
+        # var domain, which makes the dimension propagation cheaper
+        if narrow_destination:
+            cumul_fn(delivery_index).SetRange(dest_early,
+                                              d.horizon)
+        else:
+            cumul_fn(delivery_index).SetRange(0, d.horizon)
+        add_to_assignment(slack_fn(delivery_index))
 
 def vehicle_time_constraints(v,manager,routing):
     time_dimension = routing.GetDimensionOrDie(time_dimension_name)
@@ -232,17 +330,20 @@ def vehicle_time_drive_constraints(v,base_value,manager,routing):
 
 
 
-def model_run(d,t,v,base_value,demand_subset=None,initial_routes=None,timelimit=1):
-
-    # use demand_subset to pick out a subset of nodes
-    if demand_subset != None:
-        t = unset_times(t,demand_subset)
-    else:
-        demand_subset = t.index
+def build_model(d,t,v,base_value,demand_subset,narrow_destination=False):
+    """build the full with-breaks model: dimensions, constraints and
+       disjunctions, everything short of running the search.  Callers
+       that want the usual build-and-solve behavior should use
+       model_run; this entry exists so multistart workers and the
+       reporting pass can rebuild the identical model themselves.
 
+    """
     (num_nodes,manager,routing) = setup_model(d,t,v)
 
-    drive_callback = partial(E.create_drive_callback(t, d, 11*60, 10*60), manager)
+    # manager_bound_lookup pre-binds IndexToNode, so the per-arc cost
+    # is two index conversions and an array load
+    drive_callback = E.manager_bound_lookup(
+        manager, E.drive_time_matrix(t, d, 11*60, 10*60))
     drive_callback_index = routing.RegisterTransitCallback(drive_callback)
     routing.AddDimension(
         drive_callback_index, # same "cost" evaluator as above
@@ -252,7 +353,8 @@ def model_run(d,t,v,base_value,demand_subset=None,initial_routes=None,timelimit=
         drive_dimension_name)
     drive_dimension = routing.GetDimensionOrDie(drive_dimension_name)
 
-    short_break_callback = partial(E.create_short_break_callback(t, d, 8*60, 30), manager)
+    short_break_callback = E.manager_bound_lookup(
+        manager, E.short_break_time_matrix(t, d, 8*60, 30))
     short_break_callback_index = routing.RegisterTransitCallback(short_break_callback)
     routing.AddDimension(
         short_break_callback_index, # modified "cost" evaluator as above
@@ -262,8 +364,13 @@ def model_run(d,t,v,base_value,demand_subset=None,initial_routes=None,timelimit=
         short_break_dimension_name)
     short_break_dimension = routing.GetDimensionOrDie(short_break_dimension_name)
 
-    pick_deliver_constraints(d,t,manager,routing)
-    break_nodes_time_windows(d,demand_subset,manager,routing)
+    # build the node to solver index map once and share it between the
+    # constraint passes
+    n2i = node_index_cache(manager,t.index)
+
+    pick_deliver_constraints(d,t,manager,routing,n2i,
+                             narrow_destination=narrow_destination)
+    break_nodes_time_windows(d,demand_subset,manager,routing,n2i)
 
 
     # vehicle constraints, time windows etc
@@ -275,25 +382,209 @@ def model_run(d,t,v,base_value,demand_subset=None,initial_routes=None,timelimit=
     breaks_at_nodes_constraints(d, v, t,
                                 manager,
                                 routing,
-                                base_value)
+                                base_value,
+                                n2i)
 
-    parameters = setup_params(timelimit)
     # add disjunctions to deliveries to make it not fail
     penalty = 1000000000  # The cost for dropping a demand node from the plan.
     break_penalty = 0  # The cost for dropping a break node from the plan.
     # all nodes are droppable, so add disjunctions
 
-    droppable_nodes = [routing.AddDisjunction([manager.NodeToIndex(c)],
-                                              penalty) for c in d.get_node_list()]
+    # bind the bound method once; resolving routing.AddDisjunction per
+    # node costs an attribute lookup through the SWIG proxy
+    add_disjunction = routing.AddDisjunction
+    droppable_nodes = [add_disjunction([n2i[c]],
+                                       penalty) for c in d.get_node_list()]
     breaknodes = np.setdiff1d(t.index,d.equivalence.index)
     # get rid of depot node
     breaknodes = np.delete(breaknodes,0)
 
-    more_droppables = [routing.AddDisjunction([manager.NodeToIndex(c)],
-                                              break_penalty) for c in breaknodes]
+    more_droppables = [add_disjunction([n2i[c]],
+                                       break_penalty) for c in breaknodes]
+    return (manager,routing)
+
+def model_run(d,t,v,base_value,demand_subset=None,initial_routes=None,timelimit=1,
+              narrow_destination=False,
+              first_solution_strategy=None,metaheuristic=None,
+              gls_lambda=None):
+
+    # use demand_subset to pick out a subset of nodes
+    if demand_subset != None:
+        t = unset_times(t,demand_subset)
+    else:
+        demand_subset = t.index
+
+    (manager,routing) = build_model(d,t,v,base_value,demand_subset,
+                                    narrow_destination)
+    parameters = setup_params(timelimit,first_solution_strategy,metaheuristic,
+                              gls_lambda)
     assignment = run_solver(routing,parameters,initial_routes)
     return (assignment,routing,manager)
 
+def multistart_worker(d,t,v,base_value,initial_routes,timelimit,
+                      narrow_destination,config):
+    """solve one multistart configuration.  Runs in a worker process,
+       so it rebuilds the whole model from scratch and hands back plain
+       data (objective value plus the routes), never solver objects.
+
+    """
+    (first_solution_strategy,metaheuristic,gls_lambda) = config
+    (assignment,routing,manager) = model_run(
+        d,t,v,base_value,
+        initial_routes=initial_routes,
+        timelimit=timelimit,
+        narrow_destination=narrow_destination,
+        first_solution_strategy=first_solution_strategy,
+        metaheuristic=metaheuristic,
+        gls_lambda=gls_lambda)
+    if not assignment:
+        return (None,None)
+    routes = [get_route(veh.index,assignment,routing,manager) for veh in v]
+    return (assignment.ObjectiveValue(),routes)
+
+def model_run_multistart(d,t,v,base_value,initial_routes=None,timelimit=1,
+                         narrow_destination=False,
+                         configs=None,max_workers=None):
+    """run several independently parameterized solves in parallel and
+       keep the best.  The routing library itself is single threaded,
+       so on a multi-core box the way to use the extra cores is a
+       portfolio of first-solution strategies and metaheuristics, each
+       in its own process.  Returns (assignment,routing,manager) just
+       like model_run, with the winning routes loaded into a model
+       rebuilt in this process.
+
+    """
+    if configs is None:
+        # the search parameters here have no random seed knob, so
+        # diversify the guided local search penalty weight as well as
+        # the strategy/metaheuristic pairing
+        gls = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+        configs = [
+            (routing_enums_pb2.FirstSolutionStrategy.PARALLEL_CHEAPEST_INSERTION,
+             gls, 0.1),
+            (routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC,
+             gls, 0.1),
+            (routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC,
+             gls, 0.05),
+            (routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC,
+             gls, 0.2),
+            (routing_enums_pb2.FirstSolutionStrategy.LOCAL_CHEAPEST_INSERTION,
+             gls, 0.1),
+            (routing_enums_pb2.FirstSolutionStrategy.PARALLEL_CHEAPEST_INSERTION,
+             routing_enums_pb2.LocalSearchMetaheuristic.TABU_SEARCH, None),
+        ]
+    if max_workers is None:
+        max_workers = max(1,(os.cpu_count() or 2)//2)
+
+    best_objective = None
+    best_routes = None
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(multistart_worker,
+                               d,t,v,base_value,initial_routes,timelimit,
+                               narrow_destination,config)
+                   for config in configs]
+        for (config,future) in zip(configs,futures):
+            (objective,routes) = future.result()
+            print('multistart config',config,'objective',objective)
+            if objective is None:
+                continue
+            if best_objective is None or objective < best_objective:
+                best_objective = objective
+                best_routes = routes
+
+    if best_routes is None:
+        return (None,None,None)
+
+    # rebuild the model here and load the winning routes, so the caller
+    # gets a live assignment for reporting
+    (manager,routing) = build_model(d,t,v,base_value,t.index,
+                                    narrow_destination)
+    routing.CloseModelWithParameters(setup_params(timelimit))
+    assignment = routing.ReadAssignmentFromRoutes(best_routes,True)
+    assert assignment
+    return (assignment,routing,manager)
+
+def decompose_demand(d,num_clusters):
+    """partition the feasible demand records into num_clusters groups by
+       earliest pickup time.  There are no coordinates to cluster on
+       here (the problem is defined entirely by a travel matrix), so
+       the usable decomposition axis is the time windows: loads that
+       must be picked up in the same slice of the horizon compete for
+       the same vehicle time.
+
+    """
+    feasible = d.feasible.sort_values('early')
+    records = list(feasible.itertuples(index=False))
+    size = -(-len(records)//num_clusters) # ceiling division
+    return [records[i:i+size] for i in range(0,len(records),size)]
+
+def cluster_node_subset(d,records):
+    """all the solver nodes a cluster of demand records can touch: the
+       depot, each pair's own nodes and break chains (via use_nodes),
+       plus the break chains linking one record's destination to
+       another record's origin within the cluster.
+
+    """
+    nodes = set([0])
+    for record in records:
+        nodes.update(use_nodes(record,d))
+    for r1 in records:
+        for r2 in records:
+            chain = d.get_break_node_chain(r1.destination,r2.origin)
+            if chain:
+                nodes.update(chain)
+    return list(nodes)
+
+def model_run_decomposed(d,t,v,base_value,num_clusters,timelimit=1,
+                         narrow_destination=False):
+    """solve num_clusters smaller problems, one per time-window slice of
+       the demand, then run one consolidation solve over the whole
+       problem warm started with the stitched subproblem routes.  Local
+       search cost grows super-linearly in node count, so several small
+       solves plus a warm-started big one beat a single cold solve on
+       large instances.
+
+    """
+    clusters = decompose_demand(d,num_clusters)
+    # split the time budget evenly; the final consolidation solve gets
+    # the full budget on top
+    sub_timelimit = max(1,timelimit//max(1,len(clusters)))
+    initial_routes = []
+    for records in clusters:
+        subset = cluster_node_subset(d,records)
+        # one vehicle per load is enough for a subproblem; the
+        # consolidation solve trims the fleet
+        sub_v = v[:min(len(records),len(v))]
+        (assignment,routing,manager) = model_run(
+            d,t,sub_v,base_value,
+            demand_subset=subset,
+            timelimit=sub_timelimit,
+            narrow_destination=narrow_destination)
+        if not assignment:
+            continue
+        for veh in sub_v:
+            route = get_route(veh.index,assignment,routing,manager)
+            if route:
+                initial_routes.append(route)
+
+    if len(initial_routes) > len(v):
+        # the per-cluster fleets can add up to more routes than the
+        # full model has vehicles, and ReadAssignmentFromRoutes
+        # rejects an assignment with more routes than vehicles.  Keep
+        # the routes serving the most loads; demands on the dropped
+        # routes fall back on their disjunctions in the consolidation
+        # solve
+        initial_routes.sort(
+            key=lambda route: int((d.get_demands(route) > 0).sum()),
+            reverse=True)
+        initial_routes = initial_routes[:len(v)]
+    if not initial_routes:
+        initial_routes = None
+    return model_run(d,t,v,base_value,
+                     initial_routes=initial_routes,
+                     timelimit=timelimit,
+                     narrow_destination=narrow_destination)
+
 def run_solver(routing,parameters,initial_routes):
     if initial_routes:
         routing.CloseModelWithParameters(parameters)
@@ -306,7 +597,9 @@ def run_solver(routing,parameters,initial_routes):
 
 
 
-def model_run_nobreaks(d,t,v,demand_subset=None,initial_routes=None,timelimit=1):
+def model_run_nobreaks(d,t,v,demand_subset=None,initial_routes=None,timelimit=1,
+                       narrow_destination=False,
+                       first_solution_strategy=None,metaheuristic=None):
 
     # use demand_subset to pick out a subset of nodes
     if demand_subset != None:
@@ -317,16 +610,21 @@ def model_run_nobreaks(d,t,v,demand_subset=None,initial_routes=None,timelimit=1)
 
     (num_nodes,manager,routing) = setup_model(d,t,v)
 
-    pick_deliver_constraints(d,t,manager,routing)
+    # share one node to solver index map, as in build_model
+    n2i = node_index_cache(manager,t.index)
+
+    pick_deliver_constraints(d,t,manager,routing,n2i,
+                             narrow_destination=narrow_destination)
     vehicle_time_constraints(v,manager,routing)
 
-    parameters = setup_params(timelimit)
+    parameters = setup_params(timelimit,first_solution_strategy,metaheuristic)
 
     # add disjunctions to deliveries to make it not fail
     penalty = 10000000  # The cost for dropping a demand node from the plan.
     # all nodes are droppable, so add disjunctions
 
-    droppable_nodes = [routing.AddDisjunction([manager.NodeToIndex(c)],
-                                              penalty) for c in d.get_node_list()]
+    add_disjunction = routing.AddDisjunction
+    droppable_nodes = [add_disjunction([n2i[c]],
+                                       penalty) for c in d.get_node_list()]
     assignment = run_solver(routing,parameters,initial_routes)
     return (assignment,routing,manager)
@@ -33,4 +33,15 @@ def load_matrix_from_csv(filename):
 
 def travel_time(speed,matrix):
     """convert the distance matrix into a travel time matrix"""
-    return matrix.copy().floordiv(speed)
+    # floor-divide the raw numpy buffer rather than going through the
+    # pandas floordiv machinery; one vectorized pass, no extra copy
+    minutes = matrix.to_numpy() // speed
+    if not np.isnan(minutes).any():
+        # the values are already whole numbers, and travel minutes fit
+        # easily in 32 bits, so store the N^2 matrix at half the float64
+        # footprint.  a matrix with NaN holes (solver-space) has to stay
+        # float.  the evaluators recast to int64 at the solver boundary
+        minutes = minutes.astype(np.int32)
+    return pd.DataFrame(minutes,
+                        index=matrix.index,
+                        columns=matrix.columns)
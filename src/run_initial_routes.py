@@ -60,6 +60,21 @@ def main():
 
     parser.add_argument('--noroutes',type=bool,dest='noroutes',default=False,
                         help="Disable generating initial routes.  Not recommended")
+
+    parser.add_argument('--multistart',type=int,dest='multistart',default=0,
+                        help="Run this many parallel solver processes, each with a different first-solution strategy and metaheuristic, and keep the best result.  Default 0 (single solve).")
+
+    parser.add_argument('--decompose',type=int,dest='decompose',default=0,
+                        help="Split the demand into this many time-window slices, solve each small problem separately, then consolidate with one warm-started full solve.  Default 0 (no decomposition).")
+
+    parser.add_argument('--first_solution_strategy',type=str,
+                        dest='first_solution_strategy',
+                        default='PATH_CHEAPEST_ARC',
+                        help="First solution strategy, by enum name, for A/B testing.  For example PATH_CHEAPEST_ARC (the default), PARALLEL_CHEAPEST_INSERTION, LOCAL_CHEAPEST_INSERTION, SAVINGS.")
+
+    parser.add_argument('--metaheuristic',type=str,dest='metaheuristic',
+                        default='GUIDED_LOCAL_SEARCH',
+                        help="Local search metaheuristic, by enum name.  For example GUIDED_LOCAL_SEARCH (the default), TABU_SEARCH, SIMULATED_ANNEALING.")
     args = parser.parse_args()
 
     print('read in distance matrix')
@@ -76,10 +91,6 @@ def main():
     # create dummy nodes for breaks
     expanded_mm = d.insert_nodes_for_breaks(mm)
 
-    # copy new nodes to distance matrix
-    expanded_m = reader.travel_time(60/args.speed,expanded_mm)
-    # print('original matrix of',len(matrix.index),'expanded to ',len(expanded_m.index))
-
     # vehicles:
     vehicles = V.Vehicles(args.numvehicles,args.horizon)
 
@@ -110,9 +121,33 @@ def main():
     initial_routes = None
     trip_chains = {}
 
-    trip_chainsb = IR.initial_routes_2(d,vehicles.vehicles,expanded_mm)
+    trip_chainsb = IR.initial_routes_2(d,vehicles.vehicles,expanded_mm,
+                                       debug=args.debug)
     initial_routesb = [v for v in trip_chainsb.values()]
-    (assB,routing,manager) = MR.model_run(d,expanded_mm,vehicles.vehicles,args.drive_dimension_start_value,None,initial_routesb,args.timelimit)
+    # map the A/B test flags to their enum values
+    first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.Value(
+        args.first_solution_strategy)
+    metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.Value(
+        args.metaheuristic)
+
+    if args.decompose > 1:
+        (assB,routing,manager) = MR.model_run_decomposed(
+            d,expanded_mm,vehicles.vehicles,args.drive_dimension_start_value,
+            args.decompose,
+            timelimit=args.timelimit,
+            narrow_destination=args.destination_time_windows)
+    elif args.multistart > 0:
+        (assB,routing,manager) = MR.model_run_multistart(
+            d,expanded_mm,vehicles.vehicles,args.drive_dimension_start_value,
+            initial_routes=initial_routesb,
+            timelimit=args.timelimit,
+            narrow_destination=args.destination_time_windows,
+            max_workers=args.multistart)
+    else:
+        (assB,routing,manager) = MR.model_run(d,expanded_mm,vehicles.vehicles,args.drive_dimension_start_value,None,initial_routesb,args.timelimit,
+                                              narrow_destination=args.destination_time_windows,
+                                              first_solution_strategy=first_solution_strategy,
+                                              metaheuristic=metaheuristic)
     # 1201918
 
     # # set up initial routes by creating a lot of little problems
@@ -130,6 +165,13 @@ def main():
 
     if assB:
         assignment = assB
+        # derive the distance matrix for the new nodes now, since it is
+        # only needed for reporting.  break nodes exist only in time
+        # space, so this has to come from expanded_mm, not the original
+        # distance matrix
+        expanded_m = reader.travel_time(60/args.speed,expanded_mm)
+        # print('original matrix of',len(matrix.index),'expanded to ',len(expanded_m.index))
+
         ## save the assignment, (Google Protobuf format)
         #save_file_base = os.path.realpath(__file__).split('.')[0]
         #if routing.WriteAssignment(save_file_base + '_assignment.ass'):
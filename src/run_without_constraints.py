@@ -58,6 +58,15 @@ def main():
     parser.add_argument('--debug', type=bool, dest='debug', default=False,
                         help="Turn on some print statements.")
 
+    parser.add_argument('--first_solution_strategy',type=str,
+                        dest='first_solution_strategy',
+                        default='PATH_CHEAPEST_ARC',
+                        help="First solution strategy, by enum name, for A/B testing.  For example PATH_CHEAPEST_ARC (the default), PARALLEL_CHEAPEST_INSERTION, LOCAL_CHEAPEST_INSERTION, SAVINGS.")
+
+    parser.add_argument('--metaheuristic',type=str,dest='metaheuristic',
+                        default='GUIDED_LOCAL_SEARCH',
+                        help="Local search metaheuristic, by enum name.  For example GUIDED_LOCAL_SEARCH (the default), TABU_SEARCH, SIMULATED_ANNEALING.")
+
     args = parser.parse_args()
 
     print('read in distance matrix')
@@ -71,10 +80,6 @@ def main():
     # convert nodes to solver space from input map space
     expanded_mm = d.generate_solver_space_matrix(minutes_matrix,args.horizon)
 
-    # echo nodes to distance matrix
-    expanded_m = reader.travel_time(60/args.speed,expanded_mm)
-    # print('original matrix of',len(matrix.index),'expanded to ',len(expanded_m.index))
-
     # vehicles:
     vehicles = V.Vehicles(args.numvehicles,args.horizon)
 
@@ -97,6 +102,12 @@ def main():
                           'destination']])
 
 
+    # map the A/B test flags to their enum values
+    first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.Value(
+        args.first_solution_strategy)
+    metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.Value(
+        args.metaheuristic)
+
     initial_routes = None
     trip_chains = {}
     assignment=None
@@ -108,12 +119,23 @@ def main():
         initial_routes = [v for v in trip_chains.values()]
         (assignment,routing,manager) = MR.model_run_nobreaks(d,expanded_mm,vehicles.vehicles,
                                                              None,initial_routes,
-                                                             timelimit=args.timelimit)
+                                                             timelimit=args.timelimit,
+                                                             narrow_destination=args.destination_time_windows,
+                                                             first_solution_strategy=first_solution_strategy,
+                                                             metaheuristic=metaheuristic)
     else:
         (assignment,routing,manager) = MR.model_run_nobreaks(d,expanded_mm,vehicles.vehicles,
-                                                             timelimit=args.timelimit)
+                                                             timelimit=args.timelimit,
+                                                             narrow_destination=args.destination_time_windows,
+                                                             first_solution_strategy=first_solution_strategy,
+                                                             metaheuristic=metaheuristic)
 
     if assignment:
+        # distance matrix in solver space is only needed for reporting,
+        # so derive it from the time matrix after a successful solve
+        expanded_m = reader.travel_time(60/args.speed,expanded_mm)
+        # print('original matrix of',len(matrix.index),'expanded to ',len(expanded_m.index))
+
         ## save the assignment, (Google Protobuf format)
         #save_file_base = os.path.realpath(__file__).split('.')[0]
         #if routing.WriteAssignment(save_file_base + '_assignment.ass'):
@@ -86,6 +86,12 @@ def print_solution(demand,
         service_details = {}
         vehicle_id = vehicle.index
         index = routing.Start(vehicle_id)
+        # vehicles that go straight from start to end are unused; skip
+        # the whole route walk for them---with many idle vehicles that
+        # is most of the loop
+        if routing.IsEnd(assignment.Value(routing.NextVar(index))):
+            output_string += '\nRoute for vehicle {}: unused\n'.format(vehicle_id)
+            continue
         previous_index = None
         plan_output  ='Route for vehicle {}:\n'.format(vehicle_id)
         distance = 0
@@ -177,10 +183,11 @@ def print_solution(demand,
 
             this_time = routing.GetArcCostForVehicle(previous_index, index,
                                                      vehicle_id)
-            this_distance = int(dist_matrix.loc[manager.IndexToNode(previous_index),
-                                                manager.IndexToNode(index)])
-            link_time = int(time_matrix.loc[manager.IndexToNode(previous_index),
-                                            manager.IndexToNode(index)])
+            prev_node = manager.IndexToNode(previous_index)
+            next_node = manager.IndexToNode(index)
+            # .at, not .loc: scalar lookup without the indexing machinery
+            this_distance = int(dist_matrix.at[prev_node,next_node])
+            link_time = int(time_matrix.at[prev_node,next_node])
             distance += this_distance
             travtime += link_time
         load_var = capacity_dimension.CumulVar(index)
@@ -338,6 +345,9 @@ def csv_output(demand,
         this_vehicle_rows=[]
         vehicle_id = vehicle.index
         index = routing.Start(vehicle_id)
+        # unused vehicle; nothing would be emitted below anyway
+        if routing.IsEnd(assignment.Value(routing.NextVar(index))):
+            continue
         distance = 0
         travtime = 0
         this_distance = 0
@@ -371,10 +381,11 @@ def csv_output(demand,
             index = assignment.Value(routing.NextVar(index))
             this_time = routing.GetArcCostForVehicle(previous_index, index,
                                                      vehicle_id)
-            this_distance = int(dist_matrix.loc[manager.IndexToNode(previous_index),
-                                                manager.IndexToNode(index)])
-            link_time = int(time_matrix.loc[manager.IndexToNode(previous_index),
-                                            manager.IndexToNode(index)])
+            prev_node = manager.IndexToNode(previous_index)
+            next_node = manager.IndexToNode(index)
+            # .at, not .loc: scalar lookup without the indexing machinery
+            this_distance = int(dist_matrix.at[prev_node,next_node])
+            link_time = int(time_matrix.at[prev_node,next_node])
             distance += this_distance
             travtime += this_time
 
@@ -445,6 +456,9 @@ def csv_demand_output(demand,
         this_vehicle_rows=[]
         vehicle_id = vehicle.index
         index = routing.Start(vehicle_id)
+        # unused vehicle serves no demand; skip the route walk
+        if routing.IsEnd(assignment.Value(routing.NextVar(index))):
+            continue
         distance = 0
         travtime = 0
         this_distance = 0
@@ -489,10 +503,11 @@ def csv_demand_output(demand,
             index = assignment.Value(routing.NextVar(index))
             this_time = routing.GetArcCostForVehicle(previous_index, index,
                                                      vehicle_id)
-            this_distance = int(dist_matrix.loc[manager.IndexToNode(previous_index),
-                                                manager.IndexToNode(index)])
-            link_time = int(time_matrix.loc[manager.IndexToNode(previous_index),
-                                            manager.IndexToNode(index)])
+            prev_node = manager.IndexToNode(previous_index)
+            next_node = manager.IndexToNode(index)
+            # .at, not .loc: scalar lookup without the indexing machinery
+            this_distance = int(dist_matrix.at[prev_node,next_node])
+            link_time = int(time_matrix.at[prev_node,next_node])
             distance += this_distance
             travtime += this_time
 
@@ -2,6 +2,19 @@ from collections import namedtuple
 import pandas as pd
 import numpy as np
 
+# module level so that vehicle records can travel across process
+# boundaries (pickle can't find a class defined inside a method)
+Vehicle = namedtuple(
+  'Vehicle',
+  [
+    'index',
+    'capacity',
+    'cost',
+    'time_window',
+    'depot_index'
+  ]
+)
+
 class Vehicles():
   """
     A Class to create and hold vehicle information.
@@ -15,18 +28,6 @@ class Vehicles():
                num_vehicles,
                horizon
   ):
-    # copy the python from the example.
-    Vehicle = namedtuple(
-      'Vehicle',
-      [
-        'index',
-        'capacity',
-        'cost',
-        'time_window',
-        'depot_index'
-      ]
-    )
-
     # if( filename != None ):
     #     vehs = pd.read_csv(filename)
     # else:
@@ -42,6 +43,14 @@ class Vehicles():
     depots = np.zeros_like(idxs)
     # for now, all time windows are from 0 to horizon
 
+    # keep the columns around as arrays too.  bulk consumers (vehicle
+    # capacity lists, time window scans) can convert these in one shot
+    # instead of looping over the namedtuples
+    self.capacities = caps.astype(np.int64)
+    self.costs = costs.astype(np.int64)
+    self.tw_early = np.zeros(num_vehicles, dtype=np.int64)
+    self.tw_late = np.full(num_vehicles, horizon, dtype=np.int64)
+
     self.vehicles = [
           Vehicle(int(idx), int(capacity), int(cost), [0,horizon], int(depot_idx))
           for idx, capacity, cost, depot_idx in zip(idxs, caps, costs, depots)
@@ -1,6 +1,9 @@
 import breaks as B
 import demand as D
 import read_csv as reader
+import initial_routes as IR
+import model_run as MR
+import vehicles as V
 import math
 import pandas as pd
 import numpy as np
@@ -165,6 +168,21 @@ def test_break_node_splitter():
     next_new_node = triple[2]
     assert next_new_node == starting_node + 2
 
+def test_break_node_splitter_zero_tt():
+
+    # zero travel time: one load's dropoff map node is another load's
+    # pickup map node, so the destination to origin hop takes no time.
+    # no break nodes should be made, and no crash
+    origin = 10
+    destination = 20
+    travel_time = 0
+    starting_node = 30
+    triple = B.break_node_splitter(origin,destination,travel_time,starting_node)
+    assert len(triple)==3
+    assert len(triple[0]) == 0
+    assert triple[1] == []
+    assert triple[2] == starting_node
+
 def test_split_break_node():
 
     origin = 10
@@ -246,3 +264,58 @@ def test_insert_nodes_for_breaks():
         assert len(newtimes.loc[:,origin].index[newtimes.loc[:,origin].notna()]) == 5
         # 6 nodes link to destination---origin plus 5 break nodes
         assert len(newtimes.loc[:,dest].index[newtimes.loc[:,dest].notna()]) == 6
+
+def test_insert_nodes_for_breaks_shared_city():
+
+    # one load's dropoff map node is another load's pickup map node,
+    # so the solver-space travel time from the first destination to
+    # the second origin is zero.  the destinations-crossed-with-
+    # origins pass must handle that without making break nodes
+    horizon = 20000
+    m = reader.load_matrix_from_csv('test/data/matrix.csv')
+    odpairs = pd.DataFrame({'from_node':[7,4],
+                            'to_node':[4,9],
+                            'early':[0,0],
+                            'late':[horizon,horizon]})
+    d = D.Demand(odpairs,m,horizon)
+    assert d.demand.feasible.all()
+    mm = d.generate_solver_space_matrix(m)
+    newtimes = d.insert_nodes_for_breaks(mm)
+    assert len(newtimes) > len(mm)
+    # the zero-time hop from dropoff to next pickup gets no break chain
+    dest = int(d.demand.destination.iloc[0])
+    next_origin = int(d.demand.origin.iloc[1])
+    assert newtimes.loc[dest,next_origin] == 0
+    assert d.get_break_node_chain(dest,next_origin) is None
+
+def test_insert_nodes_for_breaks_depot_city():
+
+    # loads picked up at the depot city (from_node 0) or delivered to
+    # it (to_node 0) have a zero travel-time leg, which makes no break
+    # nodes for that leg.  the aggregation must keep every node label
+    # anyway, and the break-chain consumers must tolerate the missing
+    # chain
+    horizon = 20000
+    m = reader.load_matrix_from_csv('test/data/matrix.csv')
+    for (from_node,to_node) in [(0,9),(4,0)]:
+        odpairs = pd.DataFrame({'from_node':[from_node],
+                                'to_node':[to_node],
+                                'early':[0],
+                                'late':[horizon]})
+        d = D.Demand(odpairs,m,horizon)
+        assert d.demand.feasible.all()
+        mm = d.generate_solver_space_matrix(m)
+        newtimes = d.insert_nodes_for_breaks(mm)
+        assert len(newtimes) > len(mm)
+        # no node label dropped during aggregation
+        assert len(mm.index.difference(newtimes.index)) == 0
+        # the chain consumers survive the chainless zero-time leg
+        record = next(d.feasible.itertuples())
+        nodes = MR.use_nodes(record,d)
+        assert record.origin in nodes
+        assert record.destination in nodes
+        chains = IR.initial_routes_2(d,V.Vehicles(1,horizon).vehicles,
+                                     newtimes)
+        assert len(chains) == 1
+        assert record.origin in chains[0]
+        assert record.destination in chains[0]
@@ -62,6 +62,10 @@ def test_demand():
     assert d.get_demand(2) == -1
     assert d.get_demand(3) == 0
 
+    # vectorized versions should agree with the scalar ones
+    assert (d.get_demands([0,1,2,3]) == [0,1,-1,0]).all()
+    assert (d.get_service_times([0,1,2,3]) == [0,15,15,0]).all()
+
     mm = d.generate_solver_space_matrix(m)
     assert mm.max().max() > 0
     assert len(mm.index) == 3
@@ -14,6 +14,12 @@ def test_vehicles():
         assert veh.time_window[1] == 100 # no more default time window
         assert veh.depot_index == 0 # all vehicles are at depot 0 for now
 
+    # the array views should match the namedtuples
+    assert (v.capacities == 1).all()
+    assert (v.tw_early == 0).all()
+    assert (v.tw_late == 100).all()
+    assert len(v.capacities) == 5
+
     v2 = V.Vehicles(horizon=1000,num_vehicles=100) # test set horizon, default of 100 vehicles
     assert len(v2.vehicles) == 100
     for veh in v2.vehicles: